@@ -2,10 +2,16 @@ import streamlit as st
 import json
 import re
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import os
 from dataclasses import dataclass, asdict
 import uuid
+import glob
+import hashlib
+import math
+import random
+import threading
+from array import array
 
 # Configure page
 st.set_page_config(
@@ -187,6 +193,355 @@ class CandidateInfo:
     tech_stack: str = ""
     timestamp: str = ""
 
+# Technical question bank: tech -> [(question, difficulty)], difficulty 1 (easy) to 3 (hard)
+TECH_QUESTIONS = {
+    'python': [
+        ("What is the difference between a list and a tuple in Python?", 1),
+        ("Explain Python's GIL (Global Interpreter Lock) and its implications.", 3),
+        ("How do you handle exceptions in Python? Provide an example.", 1),
+        ("What are Python decorators and how do you use them?", 2)
+    ],
+    'javascript': [
+        ("Explain the concept of closures in JavaScript with an example.", 2),
+        ("What is the difference between '==' and '===' in JavaScript?", 1),
+        ("How does event delegation work in JavaScript?", 2),
+        ("Explain the difference between 'var', 'let', and 'const'.", 1)
+    ],
+    'java': [
+        ("What is the difference between abstract classes and interfaces in Java?", 1),
+        ("Explain Java's garbage collection mechanism.", 3),
+        ("What are the principles of OOP and how does Java implement them?", 1),
+        ("How do you handle multithreading in Java?", 3)
+    ],
+    'react': [
+        ("What is the difference between state and props in React?", 1),
+        ("Explain the React component lifecycle methods.", 2),
+        ("How do React hooks work? Give examples of useState and useEffect.", 2),
+        ("What is the virtual DOM and how does it improve performance?", 3)
+    ],
+    'django': [
+        ("Explain Django's MTV (Model-Template-View) architecture.", 1),
+        ("How do Django migrations work?", 2),
+        ("What is Django ORM and how do you perform database queries?", 1),
+        ("How do you handle authentication and authorization in Django?", 3)
+    ],
+    'sql': [
+        ("What is the difference between INNER JOIN and LEFT JOIN?", 1),
+        ("Explain database normalization and its benefits.", 2),
+        ("How do you optimize slow SQL queries?", 3),
+        ("What are database indexes and when should you use them?", 2)
+    ],
+    'aws': [
+        ("What are the main differences between EC2, ECS, and Lambda?", 2),
+        ("How do you secure AWS resources?", 3),
+        ("Explain the concept of AWS VPC and its components.", 3),
+        ("What is the difference between S3 storage classes?", 1)
+    ],
+    'docker': [
+        ("What is the difference between a Docker image and a container?", 1),
+        ("How do you optimize Docker images for production?", 3),
+        ("Explain Docker networking and volume management.", 2),
+        ("What is Docker Compose and when do you use it?", 1)
+    ],
+    # Used when no specific technology is found in the tech stack
+    'general': [
+        ("Describe your experience with software development lifecycle.", 1),
+        ("How do you approach debugging a complex issue?", 2),
+        ("What's your experience with version control systems like Git?", 1),
+        ("How do you stay updated with new technologies?", 1)
+    ]
+}
+
+# Other names that count as a mention of a bank technology
+TECH_ALIASES = {
+    'react': ['reactjs', 'react.js'],
+    'sql': ['mysql', 'postgresql', 'postgres', 'sqlite', 'mssql'],
+    'aws': ['amazon web services']
+}
+
+MAX_QUESTIONS = 5
+MAX_PER_TECH = 3           # Never more than this many questions from one technology
+STATS_FILE = 'candidate_data/question_stats.json'
+
+# Selection tuning
+SAMPLE_SIZE = 4            # Candidates drawn per pick; keeps selection O(1) in bank size
+PRIOR_WEIGHT = 5           # Answers needed before observed difficulty outweighs the bank's rating
+EXPOSURE_WEIGHT = 0.5      # Penalty per log-exposure, rotates frequently asked questions out
+SHORT_ANSWER_WORDS = 8     # Answers shorter than this count as struggled with
+
+# Probability of drawing from difficulty 1/2/3 for each target level
+LEVEL_WEIGHTS = {
+    1: (0.6, 0.3, 0.1),
+    2: (0.25, 0.5, 0.25),
+    3: (0.1, 0.3, 0.6)
+}
+
+def question_key(question: str) -> str:
+    """Stable short key for a question, independent of its position in the bank"""
+    return hashlib.sha1(question.encode('utf-8')).hexdigest()[:12]
+
+class QuestionSelector:
+    """Adaptive question selection backed by a precomputed per-question statistics table"""
+    
+    def __init__(self, bank: Dict[str, List[Tuple[str, int]]], stats_path: str = STATS_FILE):
+        self.stats_path = stats_path
+        self._lock = threading.Lock()        # Guards the table and buckets
+        self._save_lock = threading.Lock()   # Keeps stats file writes in order
+        
+        # Row-indexed question table; each distinct question gets one row
+        self.texts: List[str] = []
+        self.keys: List[str] = []
+        self.prior = array('B')
+        self.index: Dict[str, int] = {}
+        self.row_techs: List[List[str]] = []
+        for tech, items in bank.items():
+            for text, difficulty in items:
+                key = question_key(text)
+                row = self.index.get(key)
+                if row is None:
+                    row = len(self.texts)
+                    self.index[key] = row
+                    self.texts.append(text)
+                    self.keys.append(key)
+                    self.prior.append(difficulty)
+                    self.row_techs.append([])
+                self.row_techs[row].append(tech)
+        self.sizes = {tech: len(items) for tech, items in bank.items()}
+        
+        # Per-question statistics, updated incrementally from stored answers
+        self.exposures = array('I', [0]) * len(self.texts)
+        self.short_answers = array('I', [0]) * len(self.texts)
+        self._load_stats()
+        
+        # tech -> difficulty -> rows, so a pick never scans the whole bank.
+        # Rows are bucketed by effective difficulty and move as answers come in.
+        self.level = array('B', (self.current_level(row) for row in range(len(self.texts))))
+        self.buckets: Dict[str, Dict[int, List[int]]] = {tech: {1: [], 2: [], 3: []} for tech in bank}
+        for row, techs in enumerate(self.row_techs):
+            for tech in techs:
+                self.buckets[tech][self.level[row]].append(row)
+    
+    @staticmethod
+    def target_level(experience_years: str) -> int:
+        """Map years of experience to a target difficulty level"""
+        try:
+            years = float(experience_years)
+        except (TypeError, ValueError):
+            return 2
+        if years < 2:
+            return 1
+        if years < 5:
+            return 2
+        return 3
+    
+    def effective_difficulty(self, row: int) -> float:
+        """Bank difficulty blended with the difficulty observed from stored answers"""
+        seen = self.exposures[row]
+        if not seen:
+            return float(self.prior[row])
+        observed = 1 + 2 * self.short_answers[row] / seen
+        return (self.prior[row] * PRIOR_WEIGHT + observed * seen) / (PRIOR_WEIGHT + seen)
+    
+    def current_level(self, row: int) -> int:
+        """Difficulty bucket a question belongs in given its stats so far"""
+        return min(3, max(1, round(self.effective_difficulty(row))))
+    
+    def select(self, techs: List[str], experience_years: str = "",
+               limit: int = MAX_QUESTIONS) -> List[Tuple[str, int]]:
+        """Pick up to limit (tech, row) pairs, cycling through the matched technologies in turn"""
+        with self._lock:
+            return self._select(techs, experience_years, limit)
+    
+    def _select(self, techs: List[str], experience_years: str, limit: int) -> List[Tuple[str, int]]:
+        """Selection body; callers hold the lock so buckets can't change mid-pick"""
+        pools = [tech for tech in techs if tech in self.buckets and tech != 'general']
+        target = self.target_level(experience_years)
+        
+        # More techs than slots: rotate which ones are covered, keeping mention order
+        if len(pools) > limit:
+            covered = set(random.sample(pools, limit))
+            pools = [tech for tech in pools if tech in covered]
+        
+        selected: List[Tuple[str, int]] = []
+        chosen = set()
+        picks = {tech: 0 for tech in pools}
+        exhausted = set()
+        turn = 0
+        
+        # Cap each tech below its question count so the weighting always has a
+        # choice to make; any remaining slots are filled from 'general'
+        while len(selected) < limit and len(exhausted) < len(pools):
+            tech = pools[turn % len(pools)]
+            turn += 1
+            if tech in exhausted:
+                continue
+            cap = max(1, min(MAX_PER_TECH, self.sizes[tech] - 1))
+            row = self._pick(self.buckets[tech], target, chosen) if picks[tech] < cap else None
+            if row is None:
+                exhausted.add(tech)
+                continue
+            picks[tech] += 1
+            chosen.add(row)
+            selected.append((tech, row))
+        
+        while len(selected) < limit:
+            row = self._pick(self.buckets['general'], target, chosen)
+            if row is None:
+                break
+            chosen.add(row)
+            selected.append(('general', row))
+        
+        return selected
+    
+    def _pick(self, levels: Dict[int, List[int]], target: int, chosen: set) -> Optional[int]:
+        """Pick one unchosen row from a tech's buckets, or None if all are used"""
+        weights = LEVEL_WEIGHTS[target]
+        available = [level for level in (1, 2, 3) if levels[level]]
+        
+        while available:
+            level = random.choices(available, [weights[lvl - 1] for lvl in available])[0]
+            rows = levels[level]
+            
+            if len(rows) <= SAMPLE_SIZE:
+                candidates = random.sample(rows, len(rows))
+            else:
+                candidates = [rows[random.randrange(len(rows))] for _ in range(SAMPLE_SIZE)]
+            candidates = [row for row in candidates if row not in chosen]
+            if not candidates and len(rows) > SAMPLE_SIZE:
+                candidates = [row for row in rows if row not in chosen]
+            
+            if candidates:
+                return min(candidates, key=lambda row: self._score(row, target))
+            available.remove(level)
+        
+        return None
+    
+    def _score(self, row: int, target: int) -> float:
+        """Lower is better: close to the target difficulty and rarely asked"""
+        return (abs(self.effective_difficulty(row) - target)
+                + EXPOSURE_WEIGHT * math.log1p(self.exposures[row]))
+    
+    def record(self, questions: List[Dict], answers: Dict[str, str]):
+        """Fold one interview's answers into the statistics table and persist it"""
+        with self._save_lock:
+            with self._lock:
+                self._rebucket(self._apply(questions, answers))
+                stats = self._stats_snapshot()
+            self._write_stats(stats)
+    
+    def _apply(self, questions: List[Dict], answers: Dict[str, str]) -> List[int]:
+        """Update statistics for each answered question, returning the rows touched"""
+        # Read every entry before counting any, so a malformed entry raises
+        # without leaving the interview half-counted
+        updates = []
+        for q in questions:
+            row = self.index.get(q.get('key') or question_key(q['question']))
+            answer = answers.get(f"question_{q['id']}")
+            if row is None or answer is None:
+                continue
+            updates.append((row, len(answer.split()) < SHORT_ANSWER_WORDS))
+        
+        for row, is_short in updates:
+            self.exposures[row] += 1
+            if is_short:
+                self.short_answers[row] += 1
+        return [row for row, _ in updates]
+    
+    def _rebucket(self, rows: List[int]):
+        """Move rows whose effective difficulty crossed into another level"""
+        for row in rows:
+            new_level = self.current_level(row)
+            old_level = self.level[row]
+            if new_level == old_level:
+                continue
+            for tech in self.row_techs[row]:
+                self.buckets[tech][old_level].remove(row)
+                self.buckets[tech][new_level].append(row)
+            self.level[row] = new_level
+    
+    def _load_stats(self):
+        """Load the statistics table, rebuilding it from stored candidate files if missing or corrupt"""
+        try:
+            with open(self.stats_path) as f:
+                stats = json.load(f)
+        except FileNotFoundError:
+            self._rebuild_stats()
+            return
+        except (OSError, ValueError):
+            stats = None
+        
+        if not self._valid_stats(stats):
+            self._rebuild_stats()
+            return
+        
+        for key, exposures, short_answers in zip(stats['keys'], stats['exposures'], stats['short_answers']):
+            row = self.index.get(key)
+            if row is not None:
+                # A short answer is also an exposure; clamp so a bad row can't
+                # push effective difficulty out of range
+                self.exposures[row] = exposures
+                self.short_answers[row] = min(short_answers, exposures)
+    
+    @staticmethod
+    def _valid_stats(stats) -> bool:
+        """Check the stats file has the shape written by _write_stats"""
+        if not isinstance(stats, dict):
+            return False
+        columns = [stats.get(name) for name in ('keys', 'exposures', 'short_answers')]
+        if not all(isinstance(column, list) for column in columns):
+            return False
+        keys, exposures, short_answers = columns
+        if not len(keys) == len(exposures) == len(short_answers):
+            return False
+        if not all(isinstance(key, str) for key in keys):
+            return False
+        return all(
+            type(count) is int and 0 <= count < 2 ** 32
+            for count in exposures + short_answers
+        )
+    
+    def _rebuild_stats(self):
+        """Replay every stored interview into a fresh statistics table"""
+        self.exposures = array('I', [0]) * len(self.texts)
+        self.short_answers = array('I', [0]) * len(self.texts)
+        data_dir = os.path.dirname(self.stats_path) or '.'
+        paths = glob.glob(os.path.join(data_dir, 'candidate_*.json'))
+        for path in paths:
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+                self._apply(data.get('technical_questions', []), data.get('answers', {}))
+            except (OSError, ValueError, KeyError, TypeError, AttributeError):
+                continue
+        if paths:
+            # The rebuilt table is still usable in memory; the next record() retries the write
+            try:
+                self._write_stats(self._stats_snapshot())
+            except OSError:
+                pass
+    
+    def _stats_snapshot(self) -> Dict[str, list]:
+        """Non-empty rows of the statistics table, in the on-disk layout"""
+        rows = [row for row in range(len(self.texts)) if self.exposures[row]]
+        return {
+            'keys': [self.keys[row] for row in rows],
+            'exposures': [self.exposures[row] for row in rows],
+            'short_answers': [self.short_answers[row] for row in rows]
+        }
+    
+    def _write_stats(self, stats: Dict[str, list]):
+        """Write a statistics snapshot to disk atomically"""
+        os.makedirs(os.path.dirname(self.stats_path) or '.', exist_ok=True)
+        tmp_path = f"{self.stats_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(stats, f, separators=(',', ':'))
+        os.replace(tmp_path, self.stats_path)
+
+@st.cache_resource
+def get_question_selector() -> QuestionSelector:
+    """Shared selector, built once per server process"""
+    return QuestionSelector(TECH_QUESTIONS)
+
 class HiringAssistant:
     """Main class for the Hiring Assistant chatbot"""
     
@@ -313,84 +668,36 @@ class HiringAssistant:
         
         return True, ""
     
-    def generate_technical_questions(self, tech_stack: str) -> List[Dict]:
-        """Generate technical questions based on tech stack"""
+    def generate_technical_questions(self, tech_stack: str, experience_years: str = "") -> List[Dict]:
+        """Generate technical questions based on tech stack and experience"""
         tech_stack_lower = tech_stack.lower()
-        questions = []
         
-        # Tech-specific question templates
-        tech_questions = {
-            'python': [
-                "What is the difference between a list and a tuple in Python?",
-                "Explain Python's GIL (Global Interpreter Lock) and its implications.",
-                "How do you handle exceptions in Python? Provide an example.",
-                "What are Python decorators and how do you use them?"
-            ],
-            'javascript': [
-                "Explain the concept of closures in JavaScript with an example.",
-                "What is the difference between '==' and '===' in JavaScript?",
-                "How does event delegation work in JavaScript?",
-                "Explain the difference between 'var', 'let', and 'const'."
-            ],
-            'java': [
-                "What is the difference between abstract classes and interfaces in Java?",
-                "Explain Java's garbage collection mechanism.",
-                "What are the principles of OOP and how does Java implement them?",
-                "How do you handle multithreading in Java?"
-            ],
-            'react': [
-                "What is the difference between state and props in React?",
-                "Explain the React component lifecycle methods.",
-                "How do React hooks work? Give examples of useState and useEffect.",
-                "What is the virtual DOM and how does it improve performance?"
-            ],
-            'django': [
-                "Explain Django's MTV (Model-Template-View) architecture.",
-                "How do Django migrations work?",
-                "What is Django ORM and how do you perform database queries?",
-                "How do you handle authentication and authorization in Django?"
-            ],
-            'sql': [
-                "What is the difference between INNER JOIN and LEFT JOIN?",
-                "Explain database normalization and its benefits.",
-                "How do you optimize slow SQL queries?",
-                "What are database indexes and when should you use them?"
-            ],
-            'aws': [
-                "What are the main differences between EC2, ECS, and Lambda?",
-                "How do you secure AWS resources?",
-                "Explain the concept of AWS VPC and its components.",
-                "What is the difference between S3 storage classes?"
-            ],
-            'docker': [
-                "What is the difference between a Docker image and a container?",
-                "How do you optimize Docker images for production?",
-                "Explain Docker networking and volume management.",
-                "What is Docker Compose and when do you use it?"
-            ]
-        }
+        # A name must not touch other letters (so "javascript" doesn't match java)
+        # but may carry a version suffix like "python3"; ordered by where the
+        # candidate mentioned them
+        mentions = {}
+        for tech in TECH_QUESTIONS:
+            if tech == 'general':
+                continue
+            names = [tech] + TECH_ALIASES.get(tech, [])
+            pattern = r'(?<![a-z])(?:' + '|'.join(map(re.escape, names)) + r')(?![a-z])'
+            match = re.search(pattern, tech_stack_lower)
+            if match:
+                mentions[tech] = match.start()
+        matched_techs = sorted(mentions, key=mentions.get)
+        
+        selector = get_question_selector()
+        selected = selector.select(matched_techs, experience_years)
         
-        # Select questions based on mentioned technologies
-        selected_questions = []
-        for tech, tech_q in tech_questions.items():
-            if tech in tech_stack_lower:
-                selected_questions.extend(tech_q[:2])  # Take 2 questions per tech
-        
-        # If no specific tech found, use general questions
-        if not selected_questions:
-            selected_questions = [
-                "Describe your experience with software development lifecycle.",
-                "How do you approach debugging a complex issue?",
-                "What's your experience with version control systems like Git?",
-                "How do you stay updated with new technologies?"
-            ]
-        
-        # Limit to 5 questions and format them
-        for i, question in enumerate(selected_questions[:5], 1):
+        questions = []
+        for i, (tech, row) in enumerate(selected, 1):
             questions.append({
                 'id': i,
-                'question': question,
-                'tech_related': True
+                'question': selector.texts[row],
+                'tech_related': tech != 'general',
+                'tech': tech,
+                'key': selector.keys[row],
+                'difficulty': selector.level[row]
             })
         
         return questions
@@ -412,11 +719,21 @@ class HiringAssistant:
             
             with open(filename, 'w') as f:
                 json.dump(data, f, indent=2)
-            
-            return True
         except Exception as e:
             st.error(f"Error saving data: {str(e)}")
             return False
+        
+        # Fold this interview into the per-question statistics; the answers are
+        # already saved, so a stats failure must not report the save as failed
+        try:
+            get_question_selector().record(
+                st.session_state.technical_questions,
+                st.session_state.answers_collected
+            )
+        except Exception as e:
+            st.warning(f"Could not update question statistics: {str(e)}")
+        
+        return True
     
     def process_user_input(self, user_input: str) -> str:
         """Process user input based on current conversation state"""
@@ -484,7 +801,9 @@ class HiringAssistant:
         
         # Generate technical questions
         tech_stack = st.session_state.candidate_info.tech_stack
-        st.session_state.technical_questions = self.generate_technical_questions(tech_stack)
+        st.session_state.technical_questions = self.generate_technical_questions(
+            tech_stack, st.session_state.candidate_info.experience_years
+        )
         
         questions_text = "\n".join([
             f"**Q{q['id']}.** {q['question']}" 